@@ -0,0 +1,38 @@
+"""Yahoo Finance ticker search shared by the data and search endpoints."""
+
+from functools import lru_cache
+from urllib.parse import quote
+
+import orjson
+import requests
+
+SEARCH_TYPES = ('EQUITY', 'ETF', 'MUTUALFUND', 'INDEX')
+
+# Module-level so warm instances keep the TLS connection to Yahoo alive.
+_SESSION = requests.Session()
+_SESSION.headers.update({'User-Agent': 'Mozilla/5.0'})
+
+@lru_cache(maxsize=1024)
+def _search_cached(q_lower):
+    # Errors propagate so lru_cache never stores a failed lookup.
+    url = f"https://query2.finance.yahoo.com/v1/finance/search?q={quote(q_lower)}&quotesCount=10&newsCount=0"
+    resp = _SESSION.get(url, timeout=5)
+    resp.raise_for_status()
+    data = orjson.loads(resp.content)
+    results = []
+    for q in data.get('quotes', []):
+        if q.get('quoteType') in SEARCH_TYPES:
+            results.append({
+                'symbol': q.get('symbol', ''),
+                'name': q.get('shortname') or q.get('longname', ''),
+                'exchange': q.get('exchange', ''),
+                'type': q.get('quoteType', '')
+            })
+    return results
+
+def search_tickers(query):
+    """Search for tickers using Yahoo Finance."""
+    try:
+        return _search_cached(query.strip().lower())
+    except Exception:
+        return []
@@ -1,328 +1,445 @@
 """Vercel Serverless Function for Stock vs Gold API."""
 
 from http.server import BaseHTTPRequestHandler
-import json
-from urllib.parse import parse_qs, urlparse, quote
-from urllib.request import Request, urlopen
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import re
+from urllib.parse import unquote
 from datetime import datetime, timedelta
+from functools import lru_cache
+import threading
+import time
 
 import yfinance as yf
 import numpy as np
+import bottleneck as bn
+from scipy.signal import lfilter
+import orjson
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from api._search import search_tickers
 
 GOLD_TICKER = "GC=F"
+TICKER_RE = re.compile(r'^[A-Z0-9.\-=^]{1,20}$')
+
+class APIError(Exception):
+    def __init__(self, code, message, suggestions=None):
+        super().__init__(message)
+        self.code = code
+        self.suggestions = suggestions
+
+# yfinance only accepts its own curl_cffi session, so responses are cached
+# in-process as (fetched_at, value) instead of at the HTTP layer.
+HISTORY_TTL = 60 * 60
+INFO_TTL = 24 * 60 * 60
+MAX_CACHE_ENTRIES = 256
+# Windows Yahoo serves as a named period; anything else uses start/end.
+HISTORY_PERIODS = {1: '1y', 2: '2y', 5: '5y', 10: '10y'}
+INFO_MODULES = ['price', 'summaryDetail', 'defaultKeyStatistics', 'financialData']
+_history_cache = {}
+_info_cache = {}
+_payload_cache = {}
+_history_locks = {}
+
+def _cache_get(cache, key, ttl):
+    hit = cache.get(key)
+    if hit and time.monotonic() - hit[0] < ttl:
+        return hit[1]
+    return None
+
+def _cache_put(cache, key, value):
+    if key not in cache and len(cache) >= MAX_CACHE_ENTRIES:
+        cache.pop(next(iter(cache)))
+    cache[key] = (time.monotonic(), value)
+
+@lru_cache(maxsize=256)
+def get_ticker(symbol):
+    # yfinance already shares one session across Ticker objects, so none is passed.
+    return yf.Ticker(symbol)
+
+def get_history(symbol, years):
+    key = (symbol, years)
+    hist = _cache_get(_history_cache, key, HISTORY_TTL)
+    if hist is not None:
+        return hist
+    # One fetch per key at a time, so a request arriving while _prime_gold
+    # is still downloading waits for that result instead of fetching again.
+    with _history_locks.setdefault(key, threading.Lock()):
+        hist = _cache_get(_history_cache, key, HISTORY_TTL)
+        if hist is None:
+            # Dividend and split columns are never used; prices stay split-adjusted.
+            if years in HISTORY_PERIODS:
+                hist = get_ticker(symbol).history(period=HISTORY_PERIODS[years], actions=False)
+            else:
+                end_date = datetime.now()
+                start_date = end_date - timedelta(days=years * 365)
+                hist = get_ticker(symbol).history(start=start_date, end=end_date, actions=False)
+            if not hist.empty:
+                _cache_put(_history_cache, key, hist)
+    return hist
+
+def _fetch_info(symbol):
+    # Ask quoteSummary for only the modules the response reads; .info also
+    # pulls the asset profile and makes a second quote request.
+    stock = get_ticker(symbol)
+    try:
+        data = stock._quote._fetch(modules=INFO_MODULES)
+    except (AttributeError, TypeError):
+        # Private API missing or changed in this yfinance version.
+        return stock.get_info()
+    result = ((data or {}).get('quoteSummary') or {}).get('result')
+    if not result:
+        # Unknown ticker or a failed request: don't pay for the full .info.
+        return {}
+    info = {}
+    for module in result[0].values():
+        if not isinstance(module, dict):
+            continue
+        for key, value in module.items():
+            if isinstance(value, dict):
+                value = value.get('raw')
+            if value is not None:
+                info[key] = value
+    return info
+
+def get_info(symbol):
+    info = _cache_get(_info_cache, symbol, INFO_TTL)
+    if info is None:
+        try:
+            info = _fetch_info(symbol)
+        except Exception:
+            return {}
+        if info:
+            _cache_put(_info_cache, symbol, info)
+    return info
+
+def _prime_gold():
+    # Warm the gold series for the default window while the instance boots,
+    # so the first request only waits on its own stock fetch.
+    try:
+        get_history(GOLD_TICKER, 10)
+    except Exception:
+        pass
+
+threading.Thread(target=_prime_gold, daemon=True).start()
+
+def _last_value(arr):
+    return float(arr[-1]) if len(arr) and not np.isnan(arr[-1]) else None
+
+def multi_sma(data, periods):
+    """SMAs for several periods from one shared cumulative sum, keyed by period."""
+    arr = np.asarray(data, dtype=np.float64)
+    csum = np.concatenate(([0.0], np.cumsum(arr)))
+    result = {}
+    for period in periods:
+        sma = np.full(len(arr), np.nan)
+        if len(arr) >= period:
+            sma[period-1:] = (csum[period:] - csum[:-period]) / period
+        result[period] = sma
+    return result
 
 def calculate_sma(data, period):
-    if len(data) < period:
-        return [None] * len(data)
-    sma = []
-    for i in range(len(data)):
-        if i < period - 1:
-            sma.append(None)
-        else:
-            sma.append(round(sum(data[i-period+1:i+1]) / period, 6))
-    return sma
+    return multi_sma(data, (period,))[period]
 
 def calculate_ema(data, period):
-    if len(data) < period:
-        return [None] * len(data)
-    ema = [None] * (period - 1)
-    sma = sum(data[:period]) / period
-    ema.append(round(sma, 6))
-    multiplier = 2 / (period + 1)
-    for i in range(period, len(data)):
-        val = (data[i] - ema[-1]) * multiplier + ema[-1]
-        ema.append(round(val, 6))
+    arr = np.asarray(data, dtype=np.float64)
+    ema = np.full(len(arr), np.nan)
+    if len(arr) < period:
+        return ema
+    alpha = 2 / (period + 1)
+    ema[period-1] = arr[:period].mean()
+    ema[period:], _ = lfilter([alpha], [1, alpha - 1], arr[period:], zi=[(1 - alpha) * ema[period-1]])
     return ema
 
 def calculate_rsi(data, period=14):
-    if len(data) < period + 1:
-        return [None] * len(data)
-    
-    rsi = [None] * period
-    gains, losses = [], []
+    arr = np.asarray(data, dtype=np.float64)
+    rsi = np.full(len(arr), np.nan)
+    if len(arr) < period + 1:
+        return rsi
     
-    for i in range(1, len(data)):
-        change = data[i] - data[i-1]
-        gains.append(max(0, change))
-        losses.append(max(0, -change))
+    deltas = np.diff(arr)
+    gains = np.maximum(deltas, 0)
+    losses = np.maximum(-deltas, 0)
     
-    avg_gain = sum(gains[:period]) / period
-    avg_loss = sum(losses[:period]) / period
+    # Wilder smoothing: avg[n] = (avg[n-1] * (period - 1) + x[n]) / period
+    decay = (period - 1) / period
+    seed_gain = gains[:period].mean()
+    seed_loss = losses[:period].mean()
+    avg_gain, _ = lfilter([1 / period], [1, -decay], gains[period:], zi=[seed_gain * decay])
+    avg_loss, _ = lfilter([1 / period], [1, -decay], losses[period:], zi=[seed_loss * decay])
+    avg_gain = np.concatenate([[seed_gain], avg_gain])
+    avg_loss = np.concatenate([[seed_loss], avg_loss])
     
-    if avg_loss == 0:
-        rsi.append(100)
-    else:
-        rs = avg_gain / avg_loss
-        rsi.append(round(100 - (100 / (1 + rs)), 2))
-    
-    for i in range(period, len(gains)):
-        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
-        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
-        if avg_loss == 0:
-            rsi.append(100)
-        else:
-            rs = avg_gain / avg_loss
-            rsi.append(round(100 - (100 / (1 + rs)), 2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi[period:] = np.where(avg_loss == 0, 100, 100 - 100 / (1 + avg_gain / avg_loss))
     
     return rsi
 
-def calculate_macd(data, fast=12, slow=26, signal=9):
-    if len(data) < slow:
-        return [None] * len(data), [None] * len(data), [None] * len(data)
-    
-    ema_fast = calculate_ema(data, fast)
-    ema_slow = calculate_ema(data, slow)
-    
-    macd_line = []
-    for i in range(len(data)):
-        if ema_fast[i] is None or ema_slow[i] is None:
-            macd_line.append(None)
-        else:
-            macd_line.append(round(ema_fast[i] - ema_slow[i], 6))
+def calculate_macd(ema_fast, ema_slow, signal=9):
+    macd_line = ema_fast - ema_slow
+    macd_values = macd_line[~np.isnan(macd_line)]
+    offset = len(macd_line) - len(macd_values)
     
-    macd_values = [x for x in macd_line if x is not None]
-    if len(macd_values) < signal:
-        return macd_line, [None] * len(data), [None] * len(data)
-    
-    signal_line = [None] * (slow - 1)
-    ema_signal = calculate_ema(macd_values, signal)
-    signal_line.extend(ema_signal)
-    
-    histogram = []
-    for i in range(len(data)):
-        if macd_line[i] is None or i >= len(signal_line) or signal_line[i] is None:
-            histogram.append(None)
-        else:
-            histogram.append(round(macd_line[i] - signal_line[i], 6))
+    signal_line = np.full(len(macd_line), np.nan)
+    signal_line[offset:] = calculate_ema(macd_values, signal)
+    histogram = macd_line - signal_line
     
     return macd_line, signal_line, histogram
 
-def calculate_bollinger(data, period=20, std_dev=2):
-    if len(data) < period:
-        return [None] * len(data), [None] * len(data), [None] * len(data)
+def calculate_bollinger(data, period=20, std_dev=2, sma=None):
+    arr = np.asarray(data, dtype=np.float64)
+    middle = np.full(len(arr), np.nan) if sma is None else sma
+    upper = np.full(len(arr), np.nan)
+    lower = np.full(len(arr), np.nan)
+    if len(arr) < period:
+        return middle, upper, lower
     
-    sma = calculate_sma(data, period)
-    upper, lower = [], []
+    # Rolling variance from running sums of x and x^2: E[x^2] - E[x]^2
+    c1 = np.concatenate(([0.0], np.cumsum(arr)))
+    c2 = np.concatenate(([0.0], np.cumsum(arr * arr)))
+    mean = (c1[period:] - c1[:-period]) / period
+    mean2 = (c2[period:] - c2[:-period]) / period
+    std = np.sqrt(np.maximum(mean2 - mean * mean, 0))
     
-    for i in range(len(data)):
-        if i < period - 1:
-            upper.append(None)
-            lower.append(None)
-        else:
-            window = data[i-period+1:i+1]
-            std = np.std(window)
-            upper.append(round(sma[i] + std_dev * std, 6))
-            lower.append(round(sma[i] - std_dev * std, 6))
+    if sma is None:
+        middle[period-1:] = mean
+    upper[period-1:] = middle[period-1:] + std_dev * std
+    lower[period-1:] = middle[period-1:] - std_dev * std
     
-    return sma, upper, lower
+    return middle, upper, lower
 
 def calculate_stochastic(high, low, close, k_period=14, d_period=3):
+    close = np.asarray(close, dtype=np.float64)
+    k_values = np.full(len(close), np.nan)
+    d_values = np.full(len(close), np.nan)
     if len(close) < k_period:
-        return [None] * len(close), [None] * len(close)
-    
-    k_values = [None] * (k_period - 1)
+        return k_values, d_values
     
-    for i in range(k_period - 1, len(close)):
-        highest_high = max(high[i-k_period+1:i+1])
-        lowest_low = min(low[i-k_period+1:i+1])
-        if highest_high - lowest_low == 0:
-            k_values.append(50)
-        else:
-            k = ((close[i] - lowest_low) / (highest_high - lowest_low)) * 100
-            k_values.append(round(k, 2))
+    highest_high = bn.move_max(np.asarray(high, dtype=np.float64), k_period)[k_period-1:]
+    lowest_low = bn.move_min(np.asarray(low, dtype=np.float64), k_period)[k_period-1:]
+    price_range = highest_high - lowest_low
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k_values[k_period-1:] = np.where(price_range == 0, 50, (close[k_period-1:] - lowest_low) / price_range * 100)
     
-    d_values = calculate_sma(k_values, d_period)
+    d_values[k_period-1:] = calculate_sma(k_values[k_period-1:], d_period)
     return k_values, d_values
 
-def search_tickers(query):
-    try:
-        url = f"https://query2.finance.yahoo.com/v1/finance/search?q={quote(query)}&quotesCount=10&newsCount=0"
-        req = Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urlopen(req, timeout=5) as resp:
-            data = json.loads(resp.read().decode())
-            quotes = data.get('quotes', [])
-            results = []
-            for q in quotes:
-                if q.get('quoteType') in ['EQUITY', 'ETF', 'MUTUALFUND', 'INDEX']:
-                    results.append({
-                        'symbol': q.get('symbol', ''),
-                        'name': q.get('shortname') or q.get('longname', ''),
-                        'exchange': q.get('exchange', ''),
-                        'type': q.get('quoteType', '')
-                    })
-            return results
-    except:
-        return []
+def calculate_indicators(prices):
+    """Gold-denominated price indicators as rounded arrays (NaN where undefined), keyed as in the response."""
+    smas = multi_sma(prices, (20, 50, 200))
+    sma_20, sma_50, sma_200 = smas[20], smas[50], smas[200]
+    ema_12 = calculate_ema(prices, 12)
+    ema_26 = calculate_ema(prices, 26)
+    rsi = calculate_rsi(prices, 14)
+    macd_line, signal_line, macd_histogram = calculate_macd(ema_12, ema_26)
+    bb_middle, bb_upper, bb_lower = calculate_bollinger(prices, 20, 2, sma=sma_20)
+    
+    return {
+        'sma_20': np.round(sma_20, 6),
+        'sma_50': np.round(sma_50, 6),
+        'sma_200': np.round(sma_200, 6),
+        'ema_12': np.round(ema_12, 6),
+        'ema_26': np.round(ema_26, 6),
+        'rsi': np.round(rsi, 2),
+        'macd': np.round(macd_line, 6),
+        'macd_signal': np.round(signal_line, 6),
+        'macd_histogram': np.round(macd_histogram, 6),
+        'bb_upper': np.round(bb_upper, 6),
+        'bb_middle': np.round(bb_middle, 6),
+        'bb_lower': np.round(bb_lower, 6),
+    }
+
+def build_payload(ticker, years):
+    """Fetch, align and analyse one ticker and return the encoded JSON body.
+
+    Bodies are cached for HISTORY_TTL, but not when company info came back
+    empty, so a transient info failure isn't served for the whole TTL.
+    """
+    key = (ticker, years)
+    body = _cache_get(_payload_cache, key, HISTORY_TTL)
+    if body is not None:
+        return body
+    
+    # The three Yahoo round-trips are independent, so overlap them.
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        stock_future = executor.submit(get_history, ticker, years)
+        gold_future = executor.submit(get_history, GOLD_TICKER, years)
+        info_future = executor.submit(get_info, ticker)
+    stock_hist = stock_future.result()
+    gold_hist = gold_future.result()
+    info = info_future.result()
+    
+    if stock_hist.empty:
+        suggestions = search_tickers(ticker.replace('.', ' '))
+        raise APIError(404, f'No data found for {ticker}', suggestions)
+    
+    if gold_hist.empty:
+        raise APIError(500, 'Could not fetch gold prices')
+    
+    current_gold_price = gold_hist['Close'].iloc[-1]
+    
+    # Align stock and gold on the dates both traded
+    _, si, gi = np.intersect1d(stock_hist.index.asi8, gold_hist.index.asi8,
+                               assume_unique=True, return_indices=True)
+    ohlc_usd = stock_hist[['Open', 'High', 'Low', 'Close']].to_numpy()[si].T
+    volume = stock_hist['Volume'].to_numpy()[si]
+    gp = gold_hist['Close'].to_numpy()[gi]
+    
+    # Calculate gold-denominated OHLC: one reciprocal, then multiplies
+    ohlc_gold = ohlc_usd * (1.0 / gp)
+    open_usd, high_usd, low_usd, sp = ohlc_usd
+    open_gold, high_gold, low_gold, sg = ohlc_gold
+    
+    # Technical Indicators
+    indicators = calculate_indicators(sg)
+    stoch_k, stoch_d = calculate_stochastic(high_gold, low_gold, sg)
+    
+    # Volume SMA
+    volume_sma = calculate_sma(volume, 20)
+    
+    market_cap = info.get('marketCap')
+    pe_ratio = info.get('trailingPE')
+    forward_pe = info.get('forwardPE')
+    peg_ratio = info.get('pegRatio')
+    price_to_book = info.get('priceToBook')
+    dividend_yield = info.get('dividendYield')
+    eps = info.get('trailingEps')
+    revenue = info.get('totalRevenue')
+    profit_margin = info.get('profitMargins')
+    debt_to_equity = info.get('debtToEquity')
+    free_cash_flow = info.get('freeCashflow')
+    fifty_two_week_high = info.get('fiftyTwoWeekHigh')
+    fifty_two_week_low = info.get('fiftyTwoWeekLow')
+    
+    market_cap_gold = market_cap / current_gold_price if market_cap else None
+    revenue_gold = revenue / current_gold_price if revenue else None
+    fcf_gold = free_cash_flow / current_gold_price if free_cash_flow else None
+    
+    close_gold = np.round(sg, 6)
+    close_usd = np.round(sp, 2)
+    
+    data = {
+        'ticker': ticker,
+        'company_name': info.get('shortName') or info.get('longName') or ticker,
+        'dates': stock_hist.index[si].strftime('%Y-%m-%d').tolist(),
+        # OHLCV data
+        'ohlc': {
+            'open': np.round(open_gold, 6),
+            'high': np.round(high_gold, 6),
+            'low': np.round(low_gold, 6),
+            'close': close_gold,
+            'open_usd': np.round(open_usd, 2),
+            'high_usd': np.round(high_usd, 2),
+            'low_usd': np.round(low_usd, 2),
+            'close_usd': close_usd,
+        },
+        'volume': volume.astype(np.int64),
+        'volume_sma': np.round(volume_sma, 6),
+        'stock_usd': close_usd,
+        'gold_usd': np.round(gp, 2),
+        'stock_in_gold': close_gold,
+        'stats': {
+            'start_price_usd': round(sp[0], 2),
+            'end_price_usd': round(sp[-1], 2),
+            'change_usd_pct': round((sp[-1] / sp[0] - 1) * 100, 2),
+            'start_price_gold': round(sg[0], 6),
+            'end_price_gold': round(sg[-1], 6),
+            'change_gold_pct': round((sg[-1] / sg[0] - 1) * 100, 2),
+            'start_gold_price': round(gp[0], 2),
+            'end_gold_price': round(gp[-1], 2),
+            'high_gold': round(high_gold.max(), 6),
+            'low_gold': round(low_gold.min(), 6),
+            'avg_volume': int(volume.mean()) if len(volume) else 0,
+        },
+        'technical': {
+            **indicators,
+            'stoch_k': np.round(stoch_k, 2),
+            'stoch_d': np.round(stoch_d, 6),
+            'current_rsi': _last_value(indicators['rsi']),
+            'current_macd': _last_value(indicators['macd']),
+            'current_macd_signal': _last_value(indicators['macd_signal']),
+        },
+        'metrics': {
+            'market_cap_usd': market_cap,
+            'market_cap_gold': round(market_cap_gold, 2) if market_cap_gold else None,
+            'pe_ratio': round(pe_ratio, 2) if pe_ratio else None,
+            'forward_pe': round(forward_pe, 2) if forward_pe else None,
+            'peg_ratio': round(peg_ratio, 2) if peg_ratio else None,
+            'price_to_book': round(price_to_book, 2) if price_to_book else None,
+            'dividend_yield': round(dividend_yield * 100, 2) if dividend_yield else None,
+            'eps': round(eps, 2) if eps else None,
+            'revenue_usd': revenue,
+            'revenue_gold': round(revenue_gold, 2) if revenue_gold else None,
+            'profit_margin': round(profit_margin * 100, 2) if profit_margin else None,
+            'debt_to_equity': round(debt_to_equity, 2) if debt_to_equity else None,
+            'free_cash_flow_usd': free_cash_flow,
+            'free_cash_flow_gold': round(fcf_gold, 2) if fcf_gold else None,
+            '52w_high': round(fifty_two_week_high, 2) if fifty_two_week_high else None,
+            '52w_low': round(fifty_two_week_low, 2) if fifty_two_week_low else None,
+            'current_gold_price': round(current_gold_price, 2),
+        }
+    }
+    
+    body = orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+    if info:
+        _cache_put(_payload_cache, key, body)
+    return body
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
-        parsed = urlparse(self.path)
-        params = parse_qs(parsed.query)
-        
-        ticker = params.get('ticker', ['AAPL'])[0].upper()
-        years = int(params.get('years', ['10'])[0])
+        _, _, query = self.path.partition('?')
+        params = {}
+        for pair in query.split('&'):
+            key, sep, value = pair.partition('=')
+            if sep:
+                params[key] = value
         
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=years * 365)
+        ticker = unquote(params.get('ticker', 'AAPL')).upper()
+        years = params.get('years', '10')
+        if not TICKER_RE.match(ticker) or not years.isdigit():
+            self.send_error_response(400, 'Invalid ticker or years')
+            return
+        years = int(years)
         
         try:
-            stock = yf.Ticker(ticker)
-            stock_hist = stock.history(start=start_date, end=end_date)
-            
-            if stock_hist.empty:
-                suggestions = search_tickers(ticker.replace('.', ' '))
-                self.send_error_response(404, f'No data found for {ticker}', suggestions)
-                return
-            
-            gold = yf.Ticker(GOLD_TICKER)
-            gold_hist = gold.history(start=start_date, end=end_date)
-            
-            if gold_hist.empty:
-                self.send_error_response(500, 'Could not fetch gold prices')
-                return
-            
-            current_gold_price = gold_hist['Close'].iloc[-1]
-            
-            # Merge stock and gold data
-            stock_df = stock_hist[['Open', 'High', 'Low', 'Close', 'Volume']].copy()
-            gold_df = gold_hist[['Close']].rename(columns={'Close': 'gold_price'})
-            merged = stock_df.join(gold_df, how='inner')
-            
-            # Calculate gold-denominated OHLC
-            merged['open_gold'] = merged['Open'] / merged['gold_price']
-            merged['high_gold'] = merged['High'] / merged['gold_price']
-            merged['low_gold'] = merged['Low'] / merged['gold_price']
-            merged['close_gold'] = merged['Close'] / merged['gold_price']
-            
-            gold_prices = merged['close_gold'].tolist()
-            usd_prices = merged['Close'].tolist()
-            high_gold = merged['high_gold'].tolist()
-            low_gold = merged['low_gold'].tolist()
-            volume = merged['Volume'].tolist()
-            
-            # Technical Indicators
-            sma_20 = calculate_sma(gold_prices, 20)
-            sma_50 = calculate_sma(gold_prices, 50)
-            sma_200 = calculate_sma(gold_prices, 200)
-            ema_12 = calculate_ema(gold_prices, 12)
-            ema_26 = calculate_ema(gold_prices, 26)
-            rsi = calculate_rsi(gold_prices, 14)
-            macd_line, signal_line, macd_histogram = calculate_macd(gold_prices)
-            bb_middle, bb_upper, bb_lower = calculate_bollinger(gold_prices, 20, 2)
-            stoch_k, stoch_d = calculate_stochastic(high_gold, low_gold, gold_prices)
-            
-            # Volume SMA
-            volume_sma = calculate_sma(volume, 20)
-            
-            info = {}
-            try:
-                info = stock.info
-            except:
-                pass
-            
-            market_cap = info.get('marketCap')
-            pe_ratio = info.get('trailingPE')
-            forward_pe = info.get('forwardPE')
-            peg_ratio = info.get('pegRatio')
-            price_to_book = info.get('priceToBook')
-            dividend_yield = info.get('dividendYield')
-            eps = info.get('trailingEps')
-            revenue = info.get('totalRevenue')
-            profit_margin = info.get('profitMargins')
-            debt_to_equity = info.get('debtToEquity')
-            free_cash_flow = info.get('freeCashflow')
-            fifty_two_week_high = info.get('fiftyTwoWeekHigh')
-            fifty_two_week_low = info.get('fiftyTwoWeekLow')
-            
-            market_cap_gold = market_cap / current_gold_price if market_cap else None
-            revenue_gold = revenue / current_gold_price if revenue else None
-            fcf_gold = free_cash_flow / current_gold_price if free_cash_flow else None
-            
-            data = {
-                'ticker': ticker,
-                'company_name': info.get('shortName') or info.get('longName') or ticker,
-                'dates': [d.strftime('%Y-%m-%d') for d in merged.index],
-                # OHLCV data
-                'ohlc': {
-                    'open': [round(x, 6) for x in merged['open_gold'].tolist()],
-                    'high': [round(x, 6) for x in high_gold],
-                    'low': [round(x, 6) for x in low_gold],
-                    'close': [round(x, 6) for x in gold_prices],
-                    'open_usd': [round(x, 2) for x in merged['Open'].tolist()],
-                    'high_usd': [round(x, 2) for x in merged['High'].tolist()],
-                    'low_usd': [round(x, 2) for x in merged['Low'].tolist()],
-                    'close_usd': [round(x, 2) for x in usd_prices],
-                },
-                'volume': [int(v) for v in volume],
-                'volume_sma': volume_sma,
-                'stock_usd': [round(x, 2) for x in usd_prices],
-                'gold_usd': [round(x, 2) for x in merged['gold_price'].tolist()],
-                'stock_in_gold': [round(x, 6) for x in gold_prices],
-                'stats': {
-                    'start_price_usd': round(merged['Close'].iloc[0], 2),
-                    'end_price_usd': round(merged['Close'].iloc[-1], 2),
-                    'change_usd_pct': round((merged['Close'].iloc[-1] / merged['Close'].iloc[0] - 1) * 100, 2),
-                    'start_price_gold': round(merged['close_gold'].iloc[0], 6),
-                    'end_price_gold': round(merged['close_gold'].iloc[-1], 6),
-                    'change_gold_pct': round((merged['close_gold'].iloc[-1] / merged['close_gold'].iloc[0] - 1) * 100, 2),
-                    'start_gold_price': round(merged['gold_price'].iloc[0], 2),
-                    'end_gold_price': round(merged['gold_price'].iloc[-1], 2),
-                    'high_gold': round(max(high_gold), 6),
-                    'low_gold': round(min(low_gold), 6),
-                    'avg_volume': int(sum(volume) / len(volume)) if volume else 0,
-                },
-                'technical': {
-                    'sma_20': sma_20,
-                    'sma_50': sma_50,
-                    'sma_200': sma_200,
-                    'ema_12': ema_12,
-                    'ema_26': ema_26,
-                    'rsi': rsi,
-                    'macd': macd_line,
-                    'macd_signal': signal_line,
-                    'macd_histogram': macd_histogram,
-                    'bb_upper': bb_upper,
-                    'bb_middle': bb_middle,
-                    'bb_lower': bb_lower,
-                    'stoch_k': stoch_k,
-                    'stoch_d': stoch_d,
-                    'current_rsi': rsi[-1] if rsi and rsi[-1] else None,
-                    'current_macd': macd_line[-1] if macd_line and macd_line[-1] else None,
-                    'current_macd_signal': signal_line[-1] if signal_line and len(signal_line) > 0 and signal_line[-1] else None,
-                },
-                'metrics': {
-                    'market_cap_usd': market_cap,
-                    'market_cap_gold': round(market_cap_gold, 2) if market_cap_gold else None,
-                    'pe_ratio': round(pe_ratio, 2) if pe_ratio else None,
-                    'forward_pe': round(forward_pe, 2) if forward_pe else None,
-                    'peg_ratio': round(peg_ratio, 2) if peg_ratio else None,
-                    'price_to_book': round(price_to_book, 2) if price_to_book else None,
-                    'dividend_yield': round(dividend_yield * 100, 2) if dividend_yield else None,
-                    'eps': round(eps, 2) if eps else None,
-                    'revenue_usd': revenue,
-                    'revenue_gold': round(revenue_gold, 2) if revenue_gold else None,
-                    'profit_margin': round(profit_margin * 100, 2) if profit_margin else None,
-                    'debt_to_equity': round(debt_to_equity, 2) if debt_to_equity else None,
-                    'free_cash_flow_usd': free_cash_flow,
-                    'free_cash_flow_gold': round(fcf_gold, 2) if fcf_gold else None,
-                    '52w_high': round(fifty_two_week_high, 2) if fifty_two_week_high else None,
-                    '52w_low': round(fifty_two_week_low, 2) if fifty_two_week_low else None,
-                    'current_gold_price': round(current_gold_price, 2),
-                }
-            }
-            
-            self.send_json(data)
-            
+            self.send_json(build_payload(ticker, years))
+        except APIError as e:
+            self.send_error_response(e.code, str(e), e.suggestions)
         except Exception as e:
             suggestions = search_tickers(ticker.replace('.', ' ').split('.')[0])
             self.send_error_response(500, str(e), suggestions)
     
-    def send_json(self, data):
+    def send_json(self, body):
+        body, encoding = self.compress(body)
         self.send_response(200)
         self.send_header('Content-Type', 'application/json')
         self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Vary', 'Accept-Encoding')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
+        self.wfile.write(body)
+    
+    def compress(self, body):
+        accepted = set()
+        for entry in self.headers.get('Accept-Encoding', '').split(','):
+            name, *params = [p.strip() for p in entry.split(';')]
+            q = next((p[2:] for p in params if p.startswith('q=')), '1')
+            try:
+                if float(q) > 0:
+                    accepted.add(name.lower())
+            except ValueError:
+                pass
+        if brotli is not None and 'br' in accepted:
+            return brotli.compress(body, quality=4), 'br'
+        if 'gzip' in accepted:
+            return gzip.compress(body, compresslevel=1), 'gzip'
+        return body, None
     
     def send_error_response(self, code, message, suggestions=None):
         self.send_response(code)
@@ -332,4 +449,4 @@ class handler(BaseHTTPRequestHandler):
         response = {'error': message}
         if suggestions:
             response['suggestions'] = suggestions[:5]
-        self.wfile.write(json.dumps(response).encode())
+        self.wfile.write(orjson.dumps(response))
@@ -5,8 +5,10 @@
 from flask import Flask, jsonify, request, send_from_directory
 from flask_cors import CORS
 import yfinance as yf
+import numpy as np
 from datetime import datetime, timedelta
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 app = Flask(__name__, static_folder='static')
 CORS(app)
@@ -27,17 +29,21 @@ def get_data():
     start_date = end_date - timedelta(days=years * 365)
     
     try:
-        # Fetch stock data
+        # Fetch stock, gold and company info concurrently
         stock = yf.Ticker(ticker)
-        stock_hist = stock.history(start=start_date, end=end_date)
+        gold = yf.Ticker(GOLD_TICKER)
+        ex = ThreadPoolExecutor(max_workers=3)
+        f_stock = ex.submit(stock.history, start=start_date, end=end_date)
+        f_gold = ex.submit(gold.history, start=start_date, end=end_date)
+        f_info = ex.submit(lambda: stock.info)
+        # Don't block on .info here; it's only awaited once both histories are usable
+        ex.shutdown(wait=False)
+        stock_hist = f_stock.result()
+        gold_hist = f_gold.result()
         
         if stock_hist.empty:
             return jsonify({'error': f'No data found for {ticker}'}), 404
         
-        # Fetch gold data
-        gold = yf.Ticker(GOLD_TICKER)
-        gold_hist = gold.history(start=start_date, end=end_date)
-        
         if gold_hist.empty:
             return jsonify({'error': 'Could not fetch gold prices'}), 500
         
@@ -45,19 +51,18 @@ def get_data():
         current_gold_price = gold_hist['Close'].iloc[-1]
         
         # Align dates - only use dates where we have both
-        stock_df = stock_hist[['Close']].rename(columns={'Close': 'stock_price'})
-        gold_df = gold_hist[['Close']].rename(columns={'Close': 'gold_price'})
-        
-        # Merge on date index
-        merged = stock_df.join(gold_df, how='inner')
+        _, si, gi = np.intersect1d(stock_hist.index.asi8, gold_hist.index.asi8,
+                                   assume_unique=True, return_indices=True)
+        sp = stock_hist['Close'].to_numpy()[si]
+        gp = gold_hist['Close'].to_numpy()[gi]
         
         # Calculate stock price in gold (oz)
-        merged['stock_in_gold'] = merged['stock_price'] / merged['gold_price']
+        sg = sp / gp
         
         # Get company info for metrics
         info = {}
         try:
-            info = stock.info
+            info = f_info.result()
         except:
             pass
         
@@ -95,19 +100,19 @@ def get_data():
         # Prepare response
         data = {
             'ticker': ticker,
-            'dates': [d.strftime('%Y-%m-%d') for d in merged.index],
-            'stock_usd': merged['stock_price'].round(2).tolist(),
-            'gold_usd': merged['gold_price'].round(2).tolist(),
-            'stock_in_gold': merged['stock_in_gold'].round(6).tolist(),
+            'dates': stock_hist.index[si].strftime('%Y-%m-%d').tolist(),
+            'stock_usd': np.round(sp, 2).tolist(),
+            'gold_usd': np.round(gp, 2).tolist(),
+            'stock_in_gold': np.round(sg, 6).tolist(),
             'stats': {
-                'start_price_usd': round(merged['stock_price'].iloc[0], 2),
-                'end_price_usd': round(merged['stock_price'].iloc[-1], 2),
-                'change_usd_pct': round((merged['stock_price'].iloc[-1] / merged['stock_price'].iloc[0] - 1) * 100, 2),
-                'start_price_gold': round(merged['stock_in_gold'].iloc[0], 6),
-                'end_price_gold': round(merged['stock_in_gold'].iloc[-1], 6),
-                'change_gold_pct': round((merged['stock_in_gold'].iloc[-1] / merged['stock_in_gold'].iloc[0] - 1) * 100, 2),
-                'start_gold_price': round(merged['gold_price'].iloc[0], 2),
-                'end_gold_price': round(merged['gold_price'].iloc[-1], 2),
+                'start_price_usd': round(sp[0], 2),
+                'end_price_usd': round(sp[-1], 2),
+                'change_usd_pct': round((sp[-1] / sp[0] - 1) * 100, 2),
+                'start_price_gold': round(sg[0], 6),
+                'end_price_gold': round(sg[-1], 6),
+                'change_gold_pct': round((sg[-1] / sg[0] - 1) * 100, 2),
+                'start_gold_price': round(gp[0], 2),
+                'end_gold_price': round(gp[-1], 2),
             },
             'metrics': {
                 'market_cap_usd': market_cap,